@@ -1,33 +1,196 @@
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import os
+import shutil
 import uuid
+import re
 import sqlite3
+import queue
+import threading
+from contextlib import contextmanager
 from werkzeug.utils import secure_filename
 import PyPDF2
 from datetime import datetime
-import json
 import requests
+from requests.adapters import HTTPAdapter
 import base64
+from functools import wraps
+import orjson
+
+# PDFium (pypdfium2) extracts text much faster than PyPDF2; PyPDF2 stays as the fallback
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# PDFium is not thread-safe: no two threads may call into it at once, even on
+# different documents. The dev server is threaded, so every PDFium call holds this.
+PDFIUM_LOCK = threading.Lock()
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize JSON with orjson instead of the stdlib json module"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)
 
 # Configuration
 UPLOAD_FOLDER = 'uploads'
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 ALLOWED_EXTENSIONS = {'pdf', 'txt', 'md'}
+RETAIN_UPLOADS = False  # Uploads are processed in memory; set True to also keep a copy in UPLOAD_FOLDER
+PDF_READ_BUFFER_SIZE = 1 << 18  # 256KB read buffer for PDFs
+UPLOAD_COPY_BUFFER_SIZE = 1 << 20  # 1MB chunks when writing retained uploads
+MAX_EXTRACTED_TEXT = 5 * 1024 * 1024  # Stop extracting PDF pages past 5M characters
+DATABASE_PATH = 'documents.db'
+READER_POOL_SIZE = 8
+POOL_TIMEOUT = 10  # Seconds to wait for a free reader connection before failing the request
+IMAGE_ENCODE_CHUNK_SIZE = 48 * 1024  # Bytes read per chunk when base64-encoding images
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+app.config['RETAIN_UPLOADS'] = RETAIN_UPLOADS
+
+# Shared HTTP session so Plant.id calls reuse pooled TCP/TLS connections
+PLANTID = requests.Session()
+PLANTID.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# Any whitespace run (including CR/LF) collapses to a single space in clean_content
+WHITESPACE_RE = re.compile(r'\s+')
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+# SQL used on the request paths. Each pooled connection caches compiled statements
+# keyed on the exact SQL text, so these are shared rather than rebuilt per call.
+SESSION_BY_ID_SQL = 'SELECT session_id FROM sessions WHERE session_id = ?'
+SESSION_BY_USER_SQL = 'SELECT session_id FROM sessions WHERE user_id = ?'
+INSERT_SESSION_SQL = 'INSERT INTO sessions (session_id, user_id, preferences) VALUES (?, ?, ?)'
+INSERT_DOCUMENT_SQL = '''
+    INSERT INTO documents (id, title, content, file_name, file_type, file_size, uploaded_by, is_public)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+# Documents for this session or public documents, split into two index-backed selects;
+# the second skips the session's own public docs. The window SUM returns the total
+# size alongside every row.
+LIST_DOCUMENTS_SQL = '''
+    SELECT *, SUM(file_size) OVER () AS total_size
+    FROM (
+        SELECT id, title, file_name, file_type, file_size, created_at, is_public
+        FROM documents 
+        WHERE uploaded_by = ?
+        UNION ALL
+        SELECT id, title, file_name, file_type, file_size, created_at, is_public
+        FROM documents 
+        WHERE is_public = 1 AND uploaded_by IS NOT ?
+    )
+    ORDER BY created_at DESC
+'''
+DOCUMENT_OWNER_SQL = 'SELECT id FROM documents WHERE id = ? AND uploaded_by = ?'
+DELETE_DOCUMENT_SQL = 'DELETE FROM documents WHERE id = ?'
+
 # Database setup
+def get_conn():
+    """Open a SQLite connection with the per-connection PRAGMAs applied"""
+    conn = sqlite3.connect(DATABASE_PATH, isolation_level=None, check_same_thread=False)
+    try:
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA busy_timeout=5000')
+        conn.execute('PRAGMA cache_size=-20000')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA foreign_keys=ON')
+    except Exception:
+        conn.close()
+        raise
+    return conn
+
+# Connection pool: one writer guarded by a lock, several readers (WAL lets them run alongside the writer)
+# The pool is filled by init_db(), either at startup or lazily on first use.
+WRITER = None
+WRITE_LOCK = threading.Lock()
+INIT_LOCK = threading.Lock()
+READERS = queue.Queue(maxsize=READER_POOL_SIZE)
+
+def warm_statements(conn, statements):
+    """Compile SELECTs into the statement cache by running them with arguments that match nothing"""
+    for sql, params in statements:
+        conn.execute(sql, params).close()
+
+@contextmanager
+def read_conn():
+    """Borrow a reader connection from the pool"""
+    if WRITER is None:
+        init_db()
+    try:
+        conn = READERS.get(timeout=POOL_TIMEOUT)
+    except queue.Empty:
+        raise Exception('No database connection available, try again later')
+    try:
+        yield conn
+    finally:
+        READERS.put(conn)
+
+@contextmanager
+def write_conn():
+    """Hold the single writer connection for the duration of the block"""
+    if WRITER is None:
+        init_db()
+    with WRITE_LOCK:
+        yield WRITER
+
 def init_db():
-    conn = sqlite3.connect('documents.db')
-    cursor = conn.cursor()
+    """Create the schema and open the connection pool (safe to call more than once)"""
+    global WRITER
+    with INIT_LOCK:
+        if WRITER is not None:
+            return
+        
+        # Build every connection before publishing any, so a failure part-way
+        # leaves the pool empty and the next request can retry from scratch
+        opened = []
+        try:
+            writer = get_conn()
+            opened.append(writer)
+            create_schema(writer)
+            warm_statements(writer, [
+                (DOCUMENT_OWNER_SQL, (None, None))
+            ])
+            
+            # Reader connections stay open for the life of the process
+            readers = []
+            for _ in range(READER_POOL_SIZE):
+                conn = get_conn()
+                opened.append(conn)
+                conn.row_factory = sqlite3.Row
+                # LIST_DOCUMENTS_SQL is not warmed: its public branch and window SUM would
+                # scan every public document on each reader, whatever the arguments
+                warm_statements(conn, [
+                    (SESSION_BY_ID_SQL, (None,)),
+                    (SESSION_BY_USER_SQL, (None,))
+                ])
+                readers.append(conn)
+        except Exception:
+            for conn in opened:
+                conn.close()
+            raise
+        
+        for conn in readers:
+            READERS.put(conn)
+        # Publish the writer last, so a non-None WRITER means the pool is complete
+        WRITER = writer
+
+def create_schema(writer):
+    """Create tables and indexes on the writer connection"""
+    # WAL is persistent in the database file, so it only needs setting once
+    writer.execute('PRAGMA journal_mode=WAL')
+    cursor = writer.cursor()
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS documents (
             id TEXT PRIMARY KEY,
@@ -52,21 +215,83 @@ def init_db():
         )
     ''')
     
-    conn.commit()
-    conn.close()
+    # Indexes for the document listing and the session lookup by user
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_docs_owner_ts ON documents(uploaded_by, created_at DESC)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_docs_public ON documents(is_public) WHERE is_public = 1')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_sessions_user ON sessions(user_id)')
 
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def process_pdf(file_path):
-    """Extract text from PDF file"""
+def page_has_text(page):
+    """Check whether a PDF page can contain text (scanned pages have no fonts)"""
+    resources = page.get('/Resources')
+    if resources is None:
+        return False
+    resources = resources.get_object()
+    if '/Font' in resources:
+        return True
+    
+    # Text can also sit inside form XObjects, which carry their own resources
+    if '/XObject' in resources:
+        for xobject in resources['/XObject'].values():
+            if xobject.get_object().get('/Subtype') == '/Form':
+                return True
+    return False
+
+def extract_pages_pdfium(stream):
+    """Extract page texts with PDFium (serialized by PDFIUM_LOCK)"""
+    with PDFIUM_LOCK:
+        pdf = pypdfium2.PdfDocument(stream)
+        try:
+            parts = []
+            total_length = 0
+            for page in pdf:
+                textpage = page.get_textpage()
+                page_text = textpage.get_text_bounded()
+                textpage.close()
+                page.close()
+                
+                parts.append(page_text)
+                total_length += len(page_text)
+                if total_length > MAX_EXTRACTED_TEXT:
+                    break
+            return parts
+        finally:
+            pdf.close()
+
+def extract_pages_pypdf2(stream):
+    """Extract page texts with PyPDF2"""
+    pdf_reader = PyPDF2.PdfReader(stream)
+    parts = []
+    total_length = 0
+    for page in pdf_reader.pages:
+        # Skip image-only pages without decompressing their streams
+        if not page_has_text(page):
+            parts.append("")
+            continue
+        
+        page_text = page.extract_text() or ""
+        parts.append(page_text)
+        total_length += len(page_text)
+        if total_length > MAX_EXTRACTED_TEXT:
+            break
+    return parts
+
+def process_pdf(stream):
+    """Extract text from a seekable binary PDF stream"""
     try:
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+        parts = None
+        if pypdfium2 is not None:
+            try:
+                parts = extract_pages_pdfium(stream)
+            except Exception:
+                # Fall back to PyPDF2 for anything PDFium cannot open
+                stream.seek(0)
+        if parts is None:
+            parts = extract_pages_pypdf2(stream)
+        text = "\n".join(parts)
         
         if not text.strip():
             raise Exception("No text content extracted from PDF")
@@ -75,20 +300,29 @@ def process_pdf(file_path):
     except Exception as e:
         raise Exception(f"Failed to process PDF: {str(e)}")
 
-def process_text(file_path):
-    """Read text file"""
+def process_text(stream):
+    """Read a UTF-8 text file from a binary stream"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return file.read().strip()
+        return stream.read().decode('utf-8').strip()
     except Exception as e:
         raise Exception(f"Failed to process text file: {str(e)}")
 
 def clean_content(content):
     """Clean and normalize content"""
-    content = content.replace('\r\n', '\n')
-    content = content.replace('\n\n\n', '\n\n')
-    content = ' '.join(content.split())
-    return content.strip()
+    return WHITESPACE_RE.sub(' ', content).strip()
+
+def encode_base64_stream(stream):
+    """Base64-encode a file stream chunk by chunk, never holding the raw bytes in full"""
+    encoded = bytearray()
+    pending = b''
+    for chunk in iter(lambda: stream.read(IMAGE_ENCODE_CHUNK_SIZE), b''):
+        # Only encode whole 3-byte groups; carry the rest so short reads never insert padding
+        pending += chunk
+        usable = len(pending) - len(pending) % 3
+        encoded += base64.b64encode(pending[:usable])
+        pending = pending[usable:]
+    encoded += base64.b64encode(pending)
+    return encoded.decode('ascii')
 
 def generate_title(filename, content):
     """Generate a title from filename and content"""
@@ -96,20 +330,29 @@ def generate_title(filename, content):
     title = filename.rsplit('.', 1)[0].replace('_', ' ').replace('-', ' ')
     return title[:100]  # Limit title length
 
-def save_document(title, content, filename, file_type, file_size, session_id, is_public):
-    """Save document to database"""
-    doc_id = str(uuid.uuid4())
-    conn = sqlite3.connect('documents.db')
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO documents (id, title, content, file_name, file_type, file_size, uploaded_by, is_public)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (doc_id, title, content, filename, file_type, file_size, session_id, is_public))
-    
-    conn.commit()
-    conn.close()
-    return doc_id
+def get_bearer_token(req):
+    """Return the token from a 'Bearer <token>' Authorization header, or None"""
+    auth_header = req.headers.get('Authorization', '')
+    return auth_header[7:] if auth_header[:7] == 'Bearer ' else None
+
+def require_session(view):
+    """Reject requests without a valid session and pass session_id to the view"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        session_id = get_bearer_token(request)
+        if not session_id:
+            return jsonify({'success': False, 'error': 'No session token provided'}), 401
+        
+        try:
+            with read_conn() as conn:
+                session_row = conn.execute(SESSION_BY_ID_SQL, (session_id,)).fetchone()
+        except Exception as e:
+            return jsonify({'success': False, 'error': str(e)}), 500
+        if not session_row:
+            return jsonify({'success': False, 'error': 'Invalid session'}), 401
+        
+        return view(*args, session_id=session_id, **kwargs)
+    return wrapper
 
 # Routes
 @app.route('/health', methods=['GET'])
@@ -127,20 +370,14 @@ def create_session():
     try:
         data = request.get_json() or {}
         user_id = data.get('userId')  # Next.js session ID
-        preferences = json.dumps(data.get('userPreferences', {}))
-        
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
+        preferences = orjson.dumps(data.get('userPreferences', {})).decode('utf-8')
         
         # Check if session already exists for this user_id
         if user_id:
-            cursor.execute('''
-                SELECT session_id FROM sessions WHERE user_id = ?
-            ''', (user_id,))
-            existing_session = cursor.fetchone()
+            with read_conn() as conn:
+                existing_session = conn.execute(SESSION_BY_USER_SQL, (user_id,)).fetchone()
             
             if existing_session:
-                conn.close()
                 return jsonify({
                     'success': True,
                     'sessionId': existing_session[0],
@@ -149,12 +386,8 @@ def create_session():
         
         # Create new session
         session_id = str(uuid.uuid4())
-        cursor.execute('''
-            INSERT INTO sessions (session_id, user_id, preferences)
-            VALUES (?, ?, ?)
-        ''', (session_id, user_id, preferences))
-        conn.commit()
-        conn.close()
+        with write_conn() as conn:
+            conn.execute(INSERT_SESSION_SQL, (session_id, user_id, preferences))
         
         return jsonify({
             'success': True,
@@ -165,25 +398,10 @@ def create_session():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/upload', methods=['POST'])
-def upload_file():
+@require_session
+def upload_file(session_id):
     """Upload and process a file"""
     try:
-        # Get session info
-        auth_header = request.headers.get('Authorization', '')
-        session_id = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
-        
-        if not session_id:
-            return jsonify({'success': False, 'error': 'No session token provided'}), 401
-        
-        # Check if session exists
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT session_id FROM sessions WHERE session_id = ?', (session_id,))
-        if not cursor.fetchone():
-            conn.close()
-            return jsonify({'success': False, 'error': 'Invalid session'}), 401
-        conn.close()
-        
         # Check if file is present
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
@@ -199,40 +417,56 @@ def upload_file():
         if not allowed_file(file.filename):
             return jsonify({'success': False, 'error': f'File type not allowed. Allowed types: {", ".join(ALLOWED_EXTENSIONS)}'}), 400
         
-        # Save file temporarily
+        # Get file info; the upload is processed straight from the request stream
         filename = secure_filename(file.filename)
-        unique_filename = f"{uuid.uuid4()}_{filename}"
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(file_path)
-        
-        # Get file info
-        file_size = os.path.getsize(file_path)
         file_type = filename.rsplit('.', 1)[1].lower()
+        file.stream.seek(0, os.SEEK_END)
+        file_size = file.stream.tell()
+        file.stream.seek(0)
         
         # Process file based on type
         if file_type == 'pdf':
-            content = process_pdf(file_path)
+            content = process_pdf(file.stream)
         elif file_type in ['txt', 'md']:
-            content = process_text(file_path)
+            content = process_text(file.stream)
         else:
-            os.remove(file_path)
             return jsonify({'success': False, 'error': f'Unsupported file type: {file_type}'}), 400
         
         # Clean content
         content = clean_content(content)
         
         if len(content) < 100:
-            os.remove(file_path)
             return jsonify({'success': False, 'error': 'Document content is too short to be useful'}), 400
         
         # Generate title
         title = generate_title(filename, content)
         
-        # Save to database
-        doc_id = save_document(title, content, filename, file_type, file_size, session_id, is_public)
-        
-        # Clean up temporary file
-        os.remove(file_path)
+        doc_id = str(uuid.uuid4())
+        
+        # Only write the upload to disk when retention is enabled. It is written before
+        # the INSERT so a failed copy never leaves a stored document behind.
+        retained_path = None
+        if app.config['RETAIN_UPLOADS']:
+            file.stream.seek(0)
+            retained_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{doc_id}_{filename}")
+            try:
+                with open(retained_path, 'wb', buffering=UPLOAD_COPY_BUFFER_SIZE) as out:
+                    shutil.copyfileobj(file.stream, out, length=UPLOAD_COPY_BUFFER_SIZE)
+            except Exception:
+                if os.path.exists(retained_path):
+                    os.remove(retained_path)
+                raise
+        
+        # Save to database; @require_session has already validated the session, and the
+        # single INSERT commits as one transaction in autocommit mode
+        try:
+            with write_conn() as conn:
+                conn.execute(INSERT_DOCUMENT_SQL,
+                             (doc_id, title, content, filename, file_type, file_size, session_id, is_public))
+        except Exception:
+            if retained_path and os.path.exists(retained_path):
+                os.remove(retained_path)
+            raise
         
         return jsonify({
             'success': True,
@@ -247,52 +481,33 @@ def upload_file():
         })
         
     except Exception as e:
-        # Clean up file if it exists
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/documents', methods=['GET'])
-def get_documents():
+@require_session
+def get_documents(session_id):
     """Get documents for a session"""
     try:
-        auth_header = request.headers.get('Authorization', '')
-        session_id = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
-        
-        if not session_id:
-            return jsonify({'success': False, 'error': 'No session token provided'}), 401
-        
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
-        
         # Get documents for this session or public documents
-        cursor.execute('''
-            SELECT id, title, file_name, file_type, file_size, created_at, is_public
-            FROM documents 
-            WHERE uploaded_by = ? OR is_public = 1
-            ORDER BY created_at DESC
-        ''', (session_id,))
-        
-        documents = []
-        for row in cursor.fetchall():
-            documents.append({
-                'id': row[0],
-                'title': row[1],
-                'fileName': row[2],
-                'fileType': row[3],
-                'fileSize': row[4],
-                'createdAt': row[5],
-                'isPublic': bool(row[6])
-            })
-        
-        conn.close()
+        with read_conn() as conn:
+            rows = conn.execute(LIST_DOCUMENTS_SQL, (session_id, session_id)).fetchall()
+        
+        documents = [{
+            'id': row['id'],
+            'title': row['title'],
+            'fileName': row['file_name'],
+            'fileType': row['file_type'],
+            'fileSize': row['file_size'],
+            'createdAt': row['created_at'],
+            'isPublic': bool(row['is_public'])
+        } for row in rows]
         
         return jsonify({
             'success': True,
             'documents': documents,
             'stats': {
                 'totalDocuments': len(documents),
-                'totalSize': sum(doc['fileSize'] for doc in documents)
+                'totalSize': rows[0]['total_size'] if rows else 0
             }
         })
         
@@ -314,7 +529,8 @@ def test_pdf():
         file_path = os.path.join(UPLOAD_FOLDER, test_file)
         
         # Process the PDF
-        content = process_pdf(file_path)
+        with open(file_path, 'rb', buffering=PDF_READ_BUFFER_SIZE) as file:
+            content = process_pdf(file)
         
         return jsonify({
             'success': True,
@@ -327,33 +543,19 @@ def test_pdf():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/documents/<document_id>', methods=['DELETE'])
-def delete_document(document_id):
+@require_session
+def delete_document(document_id, session_id):
     """Delete a document"""
     try:
-        # Get session info
-        auth_header = request.headers.get('Authorization', '')
-        session_id = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
-        
-        if not session_id:
-            return jsonify({'success': False, 'error': 'No session token provided'}), 401
-        
-        conn = sqlite3.connect('documents.db')
-        cursor = conn.cursor()
-        
-        # Check if document exists and belongs to user
-        cursor.execute('''
-            SELECT id FROM documents 
-            WHERE id = ? AND uploaded_by = ?
-        ''', (document_id, session_id))
-        
-        if not cursor.fetchone():
-            conn.close()
-            return jsonify({'success': False, 'error': 'Document not found or access denied'}), 404
-        
-        # Delete the document
-        cursor.execute('DELETE FROM documents WHERE id = ?', (document_id,))
-        conn.commit()
-        conn.close()
+        with write_conn() as conn:
+            # Check if document exists and belongs to user
+            owned = conn.execute(DOCUMENT_OWNER_SQL, (document_id, session_id)).fetchone()
+            
+            if not owned:
+                return jsonify({'success': False, 'error': 'Document not found or access denied'}), 404
+            
+            # Delete the document
+            conn.execute(DELETE_DOCUMENT_SQL, (document_id,))
         
         return jsonify({
             'success': True,
@@ -364,16 +566,10 @@ def delete_document(document_id):
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/identify-plant', methods=['POST'])
-def identify_plant():
+@require_session
+def identify_plant(session_id):
     """Identify if an image contains a plant and get plant details"""
     try:
-        # Get session info
-        auth_header = request.headers.get('Authorization', '')
-        session_id = auth_header.replace('Bearer ', '') if auth_header.startswith('Bearer ') else None
-        
-        if not session_id:
-            return jsonify({'success': False, 'error': 'No session token provided'}), 401
-        
         if 'file' not in request.files:
             return jsonify({'success': False, 'error': 'No file provided'}), 400
         
@@ -388,9 +584,8 @@ def identify_plant():
         if file_ext not in allowed_image_types:
             return jsonify({'success': False, 'error': 'Not a valid image format'}), 400
         
-        # Read the file
-        image_bytes = file.read()
-        image_base64 = base64.b64encode(image_bytes).decode('utf-8')
+        # Read and encode the file
+        image_base64 = encode_base64_stream(file.stream)
         
         # Call Plant.id API
         api_key = os.environ.get('PLANTID_API_KEY')
@@ -409,8 +604,9 @@ def identify_plant():
             'Api-Key': api_key
         }
         
-        response = requests.post(plant_id_url, json=payload, headers=headers)
-        result = response.json()
+        # Serialize up front so the large base64 string skips the stdlib json encoder
+        response = PLANTID.post(plant_id_url, data=orjson.dumps(payload), headers=headers, timeout=30)
+        result = orjson.loads(response.content)
         
         # Check if it's a plant
         is_plant = False
@@ -0,0 +1,113 @@
+# PDF parsing for the Streamlit knowledge base dashboard.
+#
+# Kept in its own module (with no Streamlit calls) so scan_knowledge_base can
+# hand these functions to a ProcessPoolExecutor: worker processes must be able
+# to import them without re-running the dashboard script.
+
+import re
+
+# pypdf is the maintained successor of PyPDF2 and extracts text noticeably faster
+try:
+    import pypdf as pdf_lib
+except ImportError:
+    import PyPDF2 as pdf_lib
+
+# PDFium (pypdfium2) is much faster still; pypdf/PyPDF2 remain the fallback
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+# Larger read buffer so seeks through big PDFs need fewer syscalls
+PDF_READ_BUFFER_SIZE = 1 << 18  # 256KB
+
+# Identifies how cached scan results were produced; bump SCAN_FORMAT_VERSION when
+# the extraction logic changes. A different PDF backend also invalidates the cache.
+SCAN_FORMAT_VERSION = 2
+EXTRACTOR_VERSION = (
+    SCAN_FORMAT_VERSION,
+    pdf_lib.__name__,
+    getattr(pdf_lib, "__version__", None),
+    pypdfium2 is not None
+)
+
+# Words are counted by iterating matches, without building a list of them
+WORD_RE = re.compile(r"\S+")
+
+# Function to extract text and page count from PDF with PDFium
+def extract_pdf_text_pdfium(file_path):
+    pdf = pypdfium2.PdfDocument(str(file_path))
+    try:
+        parts = []
+        for page in pdf:
+            textpage = page.get_textpage()
+            page_text = textpage.get_text_bounded()
+            textpage.close()
+            page.close()
+            parts.append(page_text if page_text.strip() else "[Empty page]")
+        return "\n".join(parts), len(pdf), True
+    finally:
+        pdf.close()
+
+# Function to extract text and page count from PDF.
+# Returns (text, page_count, ok); ok is False when text is an error placeholder.
+def extract_pdf_text(file_path):
+    if pypdfium2 is not None:
+        try:
+            return extract_pdf_text_pdfium(file_path)
+        except Exception:
+            # Encrypted or unusual PDFs go through pypdf, which reports them clearly
+            pass
+    
+    try:
+        with open(file_path, "rb", buffering=PDF_READ_BUFFER_SIZE) as file:
+            # strict=False skips extra validation while walking the xref table
+            reader = pdf_lib.PdfReader(file, strict=False)
+            
+            # Check if PDF is encrypted
+            if reader.is_encrypted:
+                return "[This PDF is encrypted and cannot be read without a password]", 0, False
+                
+            pages = reader.pages
+            page_count = len(pages)
+            parts = []
+            ok = True
+            for page in pages:
+                try:
+                    page_text = page.extract_text()
+                    parts.append(page_text if page_text else "[Empty page]")
+                except Exception as page_error:
+                    parts.append(f"[Error extracting page: {str(page_error)}]")
+                    ok = False
+            return "\n".join(parts), page_count, ok
+    except pdf_lib.errors.PdfReadError:
+        return "[Error: This PDF appears to be damaged or uses unsupported features]", 0, False
+    except Exception as e:
+        error_msg = str(e)
+        if "PyCryptodome" in error_msg:
+            return "[Error: This PDF requires PyCryptodome library. Install with 'pip install pycryptodome']", 0, False
+        return f"[Error extracting text: {error_msg}]", 0, False
+
+# Function to count words in text
+def count_words(text):
+    return sum(1 for _ in WORD_RE.finditer(text))
+
+# Function to estimate reading time
+def estimate_reading_time(word_count):
+    # Average reading speed: 200 words per minute
+    minutes = word_count / 200
+    return minutes
+
+# Parse one PDF for the scan; runs in a worker process
+def parse_one_pdf(pdf_file):
+    text, page_count, ok = extract_pdf_text(pdf_file)
+    word_count = count_words(text)
+    return {
+        # Failed extractions are shown but never cached, so they are retried next scan
+        "ok": ok,
+        # Keep first 1000 chars of text for preview
+        "preview": text[:1000] + "..." if len(text) > 1000 else text,
+        "page_count": page_count,
+        "word_count": word_count,
+        "reading_time": estimate_reading_time(word_count)
+    }
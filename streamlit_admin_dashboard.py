@@ -6,13 +6,16 @@ from pathlib import Path
 import re
 import glob
 import time
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
-# Check for PyPDF2
+# Check for a PDF library (pypdf, or PyPDF2 as a fallback)
 try:
-    import PyPDF2
+    from knowledge_base_worker import parse_one_pdf, EXTRACTOR_VERSION
 except ImportError:
-    st.error("PyPDF2 library is required. Install it with: `pip install PyPDF2`")
+    st.error("pypdf library is required. Install it with: `pip install pypdf`")
     st.stop()
 
 # Try importing optional dependencies
@@ -25,6 +28,10 @@ except ImportError:
 # Path to knowledge base folder
 KNOWLEDGE_BASE_PATH = Path("knowledge-base")
 
+# On-disk cache of per-PDF scan results, keyed on (path, mtime_ns, size) and
+# stamped with the extractor version so a backend change discards old entries
+SCAN_CACHE_PATH = KNOWLEDGE_BASE_PATH / ".cache.pkl"
+
 # Set up the page
 st.set_page_config(page_title="Aviratha Knowledge Base Dashboard", layout="wide")
 st.title("🌱 Hydroponics Knowledge Base Dashboard")
@@ -34,38 +41,27 @@ if "file_data" not in st.session_state:
     st.session_state["file_data"] = None
     st.session_state["last_scan_time"] = None
 
-# Function to extract text from PDF
-def extract_pdf_text(file_path):
+# Load the on-disk scan cache (empty if missing, unreadable or from another extractor version)
+def load_scan_cache():
     try:
-        with open(file_path, "rb") as file:
-            reader = PyPDF2.PdfReader(file)
-            
-            # Check if PDF is encrypted
-            if reader.is_encrypted:
-                return "[This PDF is encrypted and cannot be read without a password]"
-                
-            text = ""
-            for page in reader.pages:
-                try:
-                    page_text = page.extract_text()
-                    text += page_text + "\n" if page_text else "[Empty page]\n"
-                except Exception as page_error:
-                    text += f"[Error extracting page: {str(page_error)}]\n"
-            return text
-    except PyPDF2.errors.PdfReadError:
-        return "[Error: This PDF appears to be damaged or uses unsupported features]"
-    except Exception as e:
-        error_msg = str(e)
-        if "PyCryptodome" in error_msg:
-            return "[Error: This PDF requires PyCryptodome library. Install with 'pip install pycryptodome']"
-        return f"[Error extracting text: {error_msg}]"
+        with open(SCAN_CACHE_PATH, "rb") as file:
+            data = pickle.load(file)
+    except Exception:
+        # Any unreadable cache (corrupt, newer pickle protocol, ...) just means a full rescan
+        return {}
+    if not isinstance(data, dict) or data.get("version") != EXTRACTOR_VERSION:
+        return {}
+    return data.get("entries", {})
 
-# Function to estimate reading time
-def estimate_reading_time(text):
-    # Average reading speed: 200 words per minute
-    word_count = len(text.split())
-    minutes = word_count / 200
-    return minutes
+# Write the scan cache atomically so a crash never leaves a truncated file
+def save_scan_cache(cache):
+    tmp_path = SCAN_CACHE_PATH.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "wb") as file:
+            pickle.dump({"version": EXTRACTOR_VERSION, "entries": cache}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, SCAN_CACHE_PATH)
+    except OSError:
+        pass
 
 # Scan knowledge base files
 @st.cache_data(ttl=300)  # Cache for 5 minutes
@@ -77,41 +73,79 @@ def scan_knowledge_base():
     if not KNOWLEDGE_BASE_PATH.exists():
         return [], []
     
-    # Get all categories (subfolders)
+    cache = load_scan_cache()
+    new_cache = {}
+    
+    # Get all categories (subfolders) and a flat list of their PDFs
+    tasks = []
     for category_path in KNOWLEDGE_BASE_PATH.iterdir():
         if category_path.is_dir():
-            category_name = category_path.name
-            categories.append(category_name)
-            
-            # Get all PDFs in this category
+            categories.append(category_path.name)
             for pdf_file in category_path.glob("*.pdf"):
                 file_stat = pdf_file.stat()
-                
-                # Extract first 1000 chars of text for preview
-                text = extract_pdf_text(pdf_file)
-                preview = text[:1000] + "..." if len(text) > 1000 else text
-                
-                # Count pages
-                with open(pdf_file, "rb") as file:
-                    reader = PyPDF2.PdfReader(file)
-                    page_count = len(reader.pages)
-                
-                files_data.append({
-                    "fileName": pdf_file.name,
-                    "filePath": str(pdf_file),
-                    "category": category_name,
-                    "fileSize": file_stat.st_size,
-                    "fileSizeKB": file_stat.st_size / 1024,
-                    "createdAt": datetime.fromtimestamp(file_stat.st_ctime),
-                    "modifiedAt": datetime.fromtimestamp(file_stat.st_mtime),
-                    "pageCount": page_count,
-                    "textPreview": preview,
-                    "wordCount": len(text.split()),
-                    "readingTimeMinutes": estimate_reading_time(text)
-                })
+                cache_key = (str(pdf_file), file_stat.st_mtime_ns, file_stat.st_size)
+                tasks.append((category_path.name, pdf_file, file_stat, cache_key))
+    
+    # Only re-parse PDFs that changed since the last scan, spread across processes.
+    # Use spawn: forking Streamlit's threaded server (with PDFium loaded) can deadlock.
+    to_parse = [task for task in tasks if task[3] not in cache]
+    if to_parse:
+        max_workers = min(len(to_parse), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=max_workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            parsed = executor.map(parse_one_pdf, [task[1] for task in to_parse], chunksize=4)
+            for task, result in zip(to_parse, parsed):
+                cache[task[3]] = result
+    
+    for category_name, pdf_file, file_stat, cache_key in tasks:
+        cached = cache[cache_key]
+        if cached["ok"]:
+            new_cache[cache_key] = cached
+        
+        files_data.append({
+            "fileName": pdf_file.name,
+            "filePath": str(pdf_file),
+            "category": category_name,
+            "fileSize": file_stat.st_size,
+            "fileSizeKB": file_stat.st_size / 1024,
+            "createdAt": datetime.fromtimestamp(file_stat.st_ctime),
+            "modifiedAt": datetime.fromtimestamp(file_stat.st_mtime),
+            "pageCount": cached["page_count"],
+            "textPreview": cached["preview"],
+            "wordCount": cached["word_count"],
+            "readingTimeMinutes": cached["reading_time"]
+        })
+    
+    if to_parse or len(new_cache) != len(cache):
+        save_scan_cache(new_cache)
                 
     return files_data, categories
 
+# Build the DataFrame and derived tables once per scan rather than on every rerun.
+# Keyed on the scan time; the leading underscore stops Streamlit hashing the file list.
+# Only the latest scan is kept, so rescans don't pile up cached DataFrames.
+@st.cache_data(max_entries=1)
+def build_dataframes(scan_time, _files_data):
+    df = pd.DataFrame(_files_data)
+    
+    category_stats = df.groupby("category").agg({
+        "fileName": "count",
+        "fileSize": "sum",
+        "pageCount": "sum",
+        "wordCount": "sum"
+    }).reset_index()
+    
+    category_stats = category_stats.rename(columns={
+        "fileName": "Files",
+        "fileSize": "Total Size (bytes)",
+        "pageCount": "Total Pages",
+        "wordCount": "Total Words"
+    })
+    
+    largest_files = df.sort_values("fileSize", ascending=False).head(5)
+    longest_reads = df.sort_values("readingTimeMinutes", ascending=False).head(5)
+    return df, category_stats, largest_files, longest_reads
+
 # Sidebar controls
 with st.sidebar:
     st.header("Knowledge Base Explorer")
@@ -149,7 +183,9 @@ else:
     if not files_data:
         st.warning("No PDF files found in the knowledge base folder")
     else:
-        df = pd.DataFrame(files_data)
+        df, category_stats, largest_files, longest_reads = build_dataframes(
+            st.session_state["last_scan_time"], files_data
+        )
         
         # Knowledge Base Summary Stats
         st.header("📊 Knowledge Base Statistics")
@@ -169,19 +205,6 @@ else:
         
         # Category information
         st.header("🗂️ Categories Overview")
-        category_stats = df.groupby("category").agg({
-            "fileName": "count",
-            "fileSize": "sum",
-            "pageCount": "sum",
-            "wordCount": "sum"
-        }).reset_index()
-        
-        category_stats = category_stats.rename(columns={
-            "fileName": "Files",
-            "fileSize": "Total Size (bytes)",
-            "pageCount": "Total Pages",
-            "wordCount": "Total Words"
-        })
         
         # Display as table
         st.dataframe(category_stats, use_container_width=True)
@@ -220,7 +243,6 @@ else:
             
             # Largest files
             st.subheader("Largest Files")
-            largest_files = df.sort_values("fileSize", ascending=False).head(5)
             st.dataframe(
                 largest_files[["fileName", "category", "fileSizeKB", "pageCount"]],
                 use_container_width=True
@@ -238,7 +260,6 @@ else:
             
             # Longest reads
             st.subheader("Longest Reading Times")
-            longest_reads = df.sort_values("readingTimeMinutes", ascending=False).head(5)
             st.dataframe(
                 longest_reads[["fileName", "category", "pageCount", "readingTimeMinutes"]],
                 use_container_width=True
@@ -258,13 +279,15 @@ else:
         
         with col2:
             search_term = st.text_input("Search by filename:")
-          # Apply filters
-        filtered_df = df.copy()
+        
+        # Apply filters as a single boolean mask (no intermediate copies)
+        mask = pd.Series(True, index=df.index)
         if selected_category != "All Categories":
-            filtered_df = filtered_df[filtered_df["category"] == selected_category]
+            mask &= df["category"] == selected_category
         
         if search_term:
-            filtered_df = filtered_df[filtered_df["fileName"].str.contains(search_term, case=False)]
+            mask &= df["fileName"].str.contains(search_term, case=False, regex=False)
+        filtered_df = df[mask]
         
         # Show filtered documents
         if not filtered_df.empty: